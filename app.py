@@ -2,12 +2,18 @@ import streamlit as st
 import os
 import json
 import re
+import time
+import uuid
+
+# Set WLTS_TIME_RERUNS=1 to print how long each script rerun takes
+rerun_started = time.perf_counter()
 
 # Import utility modules
 from utils.audio_processing import download_youtube_audio, get_audio_player_html
-from utils.transcription import transcribe_audio, find_word_instances
+from utils.transcription import transcribe_audio, find_word_instances, get_transcription_languages
 from utils.video_utils import download_youtube_video, generate_srt_from_whisper_json
-from utils.ui_components import apply_custom_css, display_app_header, create_styled_container, display_footer, display_word_search_results, display_badge
+from utils.transcript_io import FORMATS, FORMAT_NAMES, dump_transcript_cached, format_from_path, load_transcript_bytes
+from utils.ui_components import apply_custom_css, display_app_header, create_styled_container, display_footer, display_word_search_results, display_badge, language_selector
 
 # Page configuration with custom title and icon
 st.set_page_config(page_title="Groq Whisper WLTS Demo", page_icon="🎵", layout="wide")
@@ -33,6 +39,9 @@ with tab1:
         # YouTube URL input
         youtube_url = st.text_input("Enter YouTube URL")
 
+        # Spoken language, detected per chunk when set to auto
+        language = language_selector(key="word_finder_language")
+
         # Process button
         if st.button("Process Video"):
             if not api_key:
@@ -63,7 +72,7 @@ with tab1:
                         st.write("Transcribing audio...")
                         progress_bar.progress(75)
 
-                        transcription = transcribe_audio(audio_file, api_key)
+                        transcription = transcribe_audio(audio_file, api_key, language=language, cache_key=youtube_url)
 
                         if transcription:
                             progress_bar.progress(100)
@@ -71,15 +80,46 @@ with tab1:
 
                             # Store in session state
                             st.session_state.transcription = transcription
+                            st.session_state.transcript_id = uuid.uuid4().hex
                             st.session_state.audio_file = audio_file
                             st.session_state.video_title = video_title
 
                             # Show success message
                             st.success("Transcription complete! Now you can search for words.")
 
+        # Reload a previously exported transcript instead of processing the video again
+        saved_transcript = st.file_uploader(
+            "Or load a saved transcript", type=[extension.lstrip(".") for extension in FORMATS.values()]
+        )
+        if saved_transcript is not None and st.session_state.get("loaded_transcript_id") != saved_transcript.file_id:
+            try:
+                transcription = load_transcript_bytes(saved_transcript.getvalue(), format_from_path(saved_transcript.name))
+
+                # Store in session state; the audio is not part of a saved transcript
+                st.session_state.transcription = transcription
+                st.session_state.transcript_id = uuid.uuid4().hex
+                st.session_state.pop("audio_file", None)
+                st.session_state.video_title = saved_transcript.name
+                st.session_state.loaded_transcript_id = saved_transcript.file_id
+
+                st.success("Transcript loaded! Now you can search for words.")
+            except Exception as e:
+                st.error(f"Error loading transcript: {e}")
+
         # Word search section (only show if transcription exists)
         if "transcription" in st.session_state:
 
+            # Export the transcript so it can be reloaded later; serialized once per transcript
+            export_format = st.selectbox("Export format", list(FORMATS), format_func=FORMAT_NAMES.get)
+            try:
+                st.download_button(
+                    "Download transcript",
+                    dump_transcript_cached(st.session_state.transcript_id, st.session_state.transcription, export_format),
+                    f"transcript{FORMATS[export_format]}",
+                )
+            except ValueError as e:
+                st.error(f"Cannot export as {FORMAT_NAMES[export_format]}: {e}")
+
             st.subheader("Find Words")
             search_word = st.text_input("Enter word or phrase to search")
 
@@ -110,6 +150,7 @@ with tab2:
         # Add unique keys to all inputs
         api_key_captioning = st.text_input("Enter your Groq API Key", type="password", key="captioning_api_key")
         youtube_url_captioning = st.text_input("Enter YouTube URL", key="captioning_youtube_url")
+        language_captioning = language_selector(key="captioning_language")
 
         if st.button("Generate Captions", key="generate_captions_btn"):
             if not youtube_url_captioning:
@@ -134,13 +175,21 @@ with tab2:
                         else:
                             # Transcribe with Whisper
                             st.write("Transcribing audio...")
-                            transcription = transcribe_audio(audio_path, api_key_captioning, use_chunking=True)
+                            transcription = transcribe_audio(
+                                audio_path,
+                                api_key_captioning,
+                                use_chunking=True,
+                                language=language_captioning,
+                                cache_key=youtube_url_captioning,
+                            )
 
                             # Generate SRT file
                             st.write("Generating captions...")
                             os.makedirs("output", exist_ok=True)
                             srt_path = "output/captions.srt"
-                            generate_srt_from_whisper_json(transcription, srt_path)
+                            # Tag cues with their language only when the video mixes languages
+                            mixed_language = len(get_transcription_languages(transcription)) > 1
+                            generate_srt_from_whisper_json(transcription, srt_path, tag_language=mixed_language)
 
                             # Save paths to session state
                             st.session_state.video_path = video_path
@@ -168,3 +217,6 @@ with tab2:
 
 # Display footer
 display_footer()
+
+if os.environ.get("WLTS_TIME_RERUNS"):
+    print(f"Rerun took {(time.perf_counter() - rerun_started) * 1000:.1f} ms")
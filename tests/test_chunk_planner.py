@@ -0,0 +1,167 @@
+import math
+
+import pytest
+
+from utils.chunk_planner import (
+    BYTES_PER_SECOND,
+    DETECTION_SAMPLE_SECONDS,
+    MIN_BILLED_SECONDS,
+    DEFAULT_REQUEST_OVERHEAD,
+    DEFAULT_SECONDS_PER_AUDIO_SECOND,
+    MAX_CHUNK_MB,
+    MAX_CHUNKS,
+    MIN_CHUNK_SECONDS,
+    OVERLAP_SECONDS,
+    LatencyModel,
+    SimulatedLatency,
+    chunk_bounds,
+    plan_chunks,
+    simulate_jobs,
+)
+
+MAX_CHUNK_SECONDS = MAX_CHUNK_MB * 1024 * 1024 / BYTES_PER_SECOND
+
+
+def fitted_model(overhead, rate, lengths=(60, 120, 300)):
+    model = LatencyModel()
+    for audio_seconds in lengths:
+        model.record(audio_seconds, overhead + rate * audio_seconds)
+    return model
+
+
+def test_short_audio_stays_in_one_request():
+    plan = plan_chunks(MIN_CHUNK_SECONDS / 2)
+
+    assert plan["num_chunks"] == 1
+    assert plan["overlap_seconds"] == 0
+
+
+def test_min_chunks_forces_a_split_for_oversized_files():
+    plan = plan_chunks(MIN_CHUNK_SECONDS / 2, min_chunks=2)
+
+    assert plan["num_chunks"] == 2
+
+
+def test_chunks_never_exceed_the_size_limit():
+    duration = 3 * 3600
+    plan = plan_chunks(duration, concurrency=1)
+
+    assert plan["num_chunks"] >= math.ceil(duration / (MAX_CHUNK_SECONDS - OVERLAP_SECONDS))
+    assert plan["chunk_seconds"] <= MAX_CHUNK_SECONDS
+
+
+def test_chunk_count_is_capped_at_max_chunks():
+    # No request overhead and no cost for overlap: more chunks are always faster
+    model = fitted_model(overhead=0.0, rate=1.0)
+    plan = plan_chunks(2 * MAX_CHUNKS * MIN_CHUNK_SECONDS, concurrency=1000, latency_model=model, cost_weight=0)
+
+    assert plan["num_chunks"] == MAX_CHUNKS
+
+
+def test_sequential_requests_use_the_fewest_chunks():
+    plan = plan_chunks(3600, concurrency=1)
+
+    assert plan["num_chunks"] == math.ceil(3600 / (MAX_CHUNK_SECONDS - OVERLAP_SECONDS))
+
+
+def test_estimate_defaults_without_enough_samples():
+    model = LatencyModel()
+    assert model.estimate() == (DEFAULT_REQUEST_OVERHEAD, DEFAULT_SECONDS_PER_AUDIO_SECOND)
+
+    model.record(60, 5.0)
+    model.record(120, 6.0)
+    assert model.estimate() == (DEFAULT_REQUEST_OVERHEAD, DEFAULT_SECONDS_PER_AUDIO_SECOND)
+
+
+def test_estimate_recovers_a_linear_latency():
+    overhead, rate = fitted_model(overhead=2.0, rate=0.03).estimate()
+
+    assert overhead == pytest.approx(2.0)
+    assert rate == pytest.approx(0.03)
+
+
+def test_estimate_with_identical_lengths_fits_the_rate_only():
+    model = LatencyModel()
+    for _ in range(3):
+        model.record(100, 5.0)
+
+    overhead, rate = model.estimate()
+    assert overhead == DEFAULT_REQUEST_OVERHEAD
+    assert rate == pytest.approx((5.0 - DEFAULT_REQUEST_OVERHEAD) / 100)
+
+
+def test_estimate_with_zero_length_requests():
+    model = LatencyModel()
+    for _ in range(3):
+        model.record(0, 0.5)
+
+    assert model.estimate() == (0.5, 0.0)
+
+
+def test_estimate_clamps_negative_fits():
+    # Longer requests finishing faster would fit a negative rate
+    overhead, rate = fitted_model(overhead=10.0, rate=-0.01).estimate()
+
+    assert rate == 0.0
+    assert overhead >= 0.0
+
+
+def test_simulate_jobs_is_deterministic_for_a_seed():
+    durations = [600, 1800, 3600, 600]
+
+    def run(seed):
+        return simulate_jobs(durations, SimulatedLatency(3.0, 0.05, jitter=0.2, seed=seed), concurrency=4)
+
+    assert run(seed=7) == run(seed=7)
+    assert run(seed=7) != run(seed=8)
+
+
+def test_simulate_jobs_learns_from_observed_latency():
+    # Once a large per-request overhead has been observed, splitting stops paying off
+    plans = simulate_jobs([600, 1200, 600], SimulatedLatency(30.0, 0.0), concurrency=4)
+
+    assert plans[0]["num_chunks"] == 4
+    assert plans[-1]["num_chunks"] == 1
+
+
+def test_fixed_language_needs_no_detection():
+    plan = plan_chunks(600, language="en")
+
+    assert plan["detections"] == 0
+
+
+def test_auto_language_pays_for_a_detection_per_chunk():
+    fixed = plan_chunks(600, language="en")
+    auto = plan_chunks(600, language="auto")
+
+    assert auto["num_chunks"] == fixed["num_chunks"]
+    assert auto["detections"] == auto["num_chunks"]
+
+    extra = auto["num_chunks"] * max(DETECTION_SAMPLE_SECONDS, MIN_BILLED_SECONDS)
+    assert auto["expected_billed_seconds"] == fixed["expected_billed_seconds"] + extra
+    assert auto["expected_latency"] > fixed["expected_latency"]
+
+
+def test_detection_cost_favours_fewer_chunks():
+    # Requests are slow to start: with auto detection every extra chunk adds a second request
+    model = fitted_model(overhead=5.0, rate=0.01)
+
+    fixed = plan_chunks(600, concurrency=4, latency_model=model, language="en")
+    auto = plan_chunks(600, concurrency=4, latency_model=model, language="auto")
+
+    assert auto["num_chunks"] < fixed["num_chunks"]
+
+
+def test_cached_languages_need_no_detection():
+    plan = plan_chunks(600, language="auto", needs_detection=lambda start_ms, end_ms: False)
+
+    assert plan["detections"] == 0
+
+
+def test_chunk_bounds_cover_the_audio():
+    bounds = chunk_bounds(600, 4)
+
+    assert bounds[0][0] == 0
+    assert bounds[-1][1] == 600000
+    assert all(end - next_start == OVERLAP_SECONDS * 1000 for (_, end), (next_start, _) in zip(bounds, bounds[1:]))
+    assert chunk_bounds(600, 1) == [(0, None)]
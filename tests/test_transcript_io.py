@@ -0,0 +1,175 @@
+import pytest
+
+from utils.transcript_io import (
+    FORMATS,
+    BinaryTranscript,
+    dump_transcript,
+    load_transcript,
+    load_transcript_bytes,
+    save_transcript,
+    words_between,
+)
+from utils.transcription import CombinedTranscription
+
+
+def word(text, start, end, language="en"):
+    return {"word": text, "start": start, "end": end, "language": language}
+
+
+def segment(i, text, start, end, language="en"):
+    return {"id": i, "start": start, "end": end, "text": text, "language": language}
+
+
+WORDS = [
+    word("Hello", 0.0, 0.4),
+    word("world", 0.5, 0.9),
+    # Between the two segments
+    word("um", 1.2, 1.5),
+    word("Ça", 2.0, 2.3, "fr"),
+    word("va?", 2.4, 2.8, "fr"),
+    word("日本語", 3.0, 3.5, "ja"),
+    word("a<b&c", 3.6, 3.9, "ja"),
+]
+SEGMENTS = [
+    segment(0, " Hello world", 0.0, 1.0),
+    segment(1, " Ça va?", 2.0, 3.0, "fr"),
+    segment(2, " 日本語 a<b&c", 3.0, 4.0, "ja"),
+]
+
+
+def transcript(words=WORDS, segments=SEGMENTS):
+    return CombinedTranscription(
+        [dict(w) for w in words], [dict(s) for s in segments], " ".join(s["text"].strip() for s in segments)
+    )
+
+
+def round_trip(fmt, transcription):
+    return load_transcript_bytes(dump_transcript(transcription, fmt), fmt)
+
+
+@pytest.mark.parametrize("fmt", ["json", "jsonl", "wlts"])
+def test_words_round_trip_exactly(fmt):
+    loaded = round_trip(fmt, transcript())
+
+    assert loaded.words == WORDS
+
+
+def test_json_keeps_segments_and_text():
+    original = transcript()
+    loaded = round_trip("json", original)
+
+    assert loaded.segments == SEGMENTS
+    assert loaded.text == original.text
+
+
+def test_vtt_keeps_word_starts_texts_and_languages():
+    loaded = round_trip("vtt", transcript())
+
+    assert [(w["word"], w["start"], w["language"]) for w in loaded.words] == [
+        (w["word"], w["start"], w["language"]) for w in WORDS
+    ]
+    # Word ends are not stored: each word ends where the next one starts or at its cue end
+    assert all(w["end"] >= w["start"] for w in loaded.words)
+
+
+def test_vtt_keeps_segment_texts_and_adds_cues_for_words_between_them():
+    loaded = round_trip("vtt", transcript())
+
+    assert [(s["text"], s["start"], s["end"], s["language"]) for s in loaded.segments] == [
+        ("Hello world", 0.0, 1.0, "en"),
+        ("um", 1.2, 1.5, "en"),
+        ("Ça va?", 2.0, 3.0, "fr"),
+        ("日本語 a<b&c", 3.0, 4.0, "ja"),
+    ]
+
+
+def test_vtt_without_segments_builds_cues_from_words():
+    loaded = round_trip("vtt", round_trip("jsonl", transcript()))
+
+    assert [w["word"] for w in loaded.words] == [w["word"] for w in WORDS]
+    assert loaded.segments
+
+
+@pytest.mark.parametrize("fmt", list(FORMATS))
+def test_empty_transcripts_round_trip(fmt):
+    loaded = round_trip(fmt, transcript(words=[], segments=[]))
+
+    assert loaded.words == []
+    assert loaded.segments == []
+
+
+@pytest.mark.parametrize("fmt", list(FORMATS))
+def test_files_round_trip_by_extension(fmt, tmp_path):
+    path = save_transcript(transcript(), str(tmp_path / f"transcript{FORMATS[fmt]}"))
+
+    assert [w["word"] for w in load_transcript(path).words] == [w["word"] for w in WORDS]
+
+
+def test_unknown_extension_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        save_transcript(transcript(), str(tmp_path / "transcript.txt"))
+
+
+def test_binary_keeps_long_and_non_ascii_languages():
+    words = [word("olá", 0.0, 1.0, "portuguese-br"), word("日本", 1.0, 2.0, "日本語"), word("x", 2.0, 3.0, None)]
+
+    assert round_trip("wlts", transcript(words=words, segments=[])).words == words
+
+
+def test_binary_rejects_other_files():
+    with pytest.raises(ValueError):
+        BinaryTranscript(b"NOPE" + bytes(8))
+
+
+@pytest.fixture
+def binary_path(tmp_path):
+    words = [
+        word("one", 1.0, 1.5),
+        word("two", 2.0, 2.5),
+        # Two words starting at the same time
+        word("three", 3.0, 3.5),
+        word("drei", 3.0, 3.5, "de"),
+        word("four", 4.0, 4.5),
+    ]
+    return save_transcript(transcript(words=words, segments=[]), str(tmp_path / "transcript.wlts"))
+
+
+def texts(words):
+    return [w["word"] for w in words]
+
+
+def test_words_between_includes_both_ends(binary_path):
+    assert texts(words_between(binary_path, 2.0, 4.0)) == ["two", "three", "drei", "four"]
+
+
+def test_words_between_returns_every_word_with_an_equal_start(binary_path):
+    assert texts(words_between(binary_path, 3.0, 3.0)) == ["three", "drei"]
+
+
+def test_words_between_inside_a_gap_is_empty(binary_path):
+    assert words_between(binary_path, 2.1, 2.9) == []
+
+
+def test_words_between_before_the_first_word(binary_path):
+    assert words_between(binary_path, 0.0, 0.5) == []
+    assert texts(words_between(binary_path, 0.0, 1.0)) == ["one"]
+
+
+def test_words_between_after_the_last_word(binary_path):
+    assert words_between(binary_path, 4.1, 10.0) == []
+    assert texts(words_between(binary_path, 4.0, 10.0)) == ["four"]
+
+
+def test_words_between_on_an_empty_transcript(tmp_path):
+    path = save_transcript(transcript(words=[], segments=[]), str(tmp_path / "empty.wlts"))
+
+    assert words_between(path, 0.0, 10.0) == []
+
+
+def test_binary_transcript_from_bytes_matches_the_file(binary_path):
+    with open(binary_path, "rb") as f:
+        in_memory = BinaryTranscript(f.read())
+
+    with BinaryTranscript.open(binary_path) as mapped:
+        assert len(mapped) == len(in_memory) == 5
+        assert mapped.words_between(1.0, 4.0) == in_memory.words_between(1.0, 4.0)
@@ -0,0 +1,41 @@
+from utils.transcription import chunk_keep_ranges
+
+INF = float("inf")
+
+
+def make_chunks(*bounds):
+    return [{"file": None, "start_ms": start, "end_ms": end} for start, end in bounds]
+
+
+def test_words_are_cut_at_the_middle_of_the_overlap():
+    chunks = make_chunks((0, 152000), (150000, 302000), (300000, 600000))
+    ranges = chunk_keep_ranges(chunks, [True, True, True])
+
+    assert [(keep["words_from"], keep["words_until"]) for keep in ranges] == [
+        (-INF, 151.0),
+        (151.0, 301.0),
+        (301.0, INF),
+    ]
+
+
+def test_segments_at_a_chunk_start_are_not_lost():
+    chunks = make_chunks((0, 152000), (150000, 302000))
+    first, second = chunk_keep_ranges(chunks, [True, True])
+
+    # 10 s segments: the first chunk ends mid-segment, the second starts a new one
+    first_segments = [(140.0, 150.0), (150.0, 152.0)]
+    second_segments = [(150.0, 152.0), (150.0, 160.0), (160.0, 170.0)]
+
+    def keep_segment(keep, start, end):
+        return end > keep["segments_from"] and start < keep["segments_until"]
+
+    assert [s for s in first_segments if keep_segment(first, *s)] == [(140.0, 150.0)]
+    assert [s for s in second_segments if keep_segment(second, *s)] == [(150.0, 160.0), (160.0, 170.0)]
+
+
+def test_overlap_is_kept_next_to_a_failed_chunk():
+    chunks = make_chunks((0, 152000), (150000, 302000), (300000, 600000))
+    first, _, last = chunk_keep_ranges(chunks, [True, None, True])
+
+    assert first["words_until"] == INF and first["segments_until"] == INF
+    assert last["words_from"] == -INF and last["segments_from"] == -INF
@@ -1,40 +1,65 @@
 import os
+import math
 import tempfile
-import numpy as np
-from pydub import AudioSegment
 import streamlit as st
 import base64
-import yt_dlp
 import subprocess
 
-def chunk_audio(audio_file, chunk_size_mb=30, overlap_seconds=2):
+def get_audio_duration(audio_file):
+    """Return the duration of an audio file in seconds, read with ffprobe"""
+    try:
+        # Imported lazily so the app can start without loading pydub
+        from pydub.utils import mediainfo
+
+        return float(mediainfo(audio_file)["duration"])
+
+    except Exception as e:
+        st.warning(f"Could not read audio duration: {e}")
+        return None
+
+def chunk_audio(audio_file, chunk_size_mb=30, overlap_seconds=2, num_chunks=None):
     """
-    Split audio file into chunks with overlap
+    Split audio file into chunks with overlap.
+
+    num_chunks, when given (e.g. by the chunk planner), splits the audio into that
+    many equal chunks instead of sizing them by chunk_size_mb.
     """
     try:
+        # Imported lazily so the app can start without loading pydub
+        from pydub import AudioSegment
+
         # Load audio file
         audio = AudioSegment.from_file(audio_file)
 
-        # Calculate chunk size in milliseconds
-        bytes_per_second = 16000 * 2  # 16kHz * 16-bit (2 bytes)
-        seconds_per_mb = 1024 * 1024 / bytes_per_second
-        chunk_size_ms = int(chunk_size_mb * seconds_per_mb * 1000)
-
         # Calculate overlap in milliseconds
         overlap_ms = overlap_seconds * 1000
 
-        # Calculate number of chunks
         audio_length_ms = len(audio)
-        effective_chunk_size = chunk_size_ms - overlap_ms
-        num_chunks = max(1, int(np.ceil(audio_length_ms / effective_chunk_size)))
+
+        if num_chunks:
+            # Split at evenly spaced points of the decoded length
+            effective_chunk_size = audio_length_ms / num_chunks
+        else:
+            # Calculate chunk size in milliseconds
+            bytes_per_second = 16000 * 2  # 16kHz * 16-bit (2 bytes)
+            seconds_per_mb = 1024 * 1024 / bytes_per_second
+            chunk_size_ms = int(chunk_size_mb * seconds_per_mb * 1000)
+
+            # Calculate number of chunks
+            effective_chunk_size = chunk_size_ms - overlap_ms
+            num_chunks = max(1, math.ceil(audio_length_ms / effective_chunk_size))
 
         st.info(f"Splitting audio into {num_chunks} chunks for processing")
 
         # Create chunks with overlap
         chunk_files = []
         for i in range(num_chunks):
-            start_ms = i * effective_chunk_size
-            end_ms = min(start_ms + chunk_size_ms, audio_length_ms)
+            start_ms = int(i * effective_chunk_size)
+            end_ms = min(int((i + 1) * effective_chunk_size) + overlap_ms, audio_length_ms)
+
+            # The last chunk always runs to the end of the audio
+            if i == num_chunks - 1:
+                end_ms = audio_length_ms
 
             # Extract chunk
             chunk = audio[start_ms:end_ms]
@@ -50,8 +75,36 @@ def chunk_audio(audio_file, chunk_size_mb=30, overlap_seconds=2):
         st.error(f"Error chunking audio: {e}")
         return None
 
+def extract_audio_sample(audio_file, duration_seconds=15, start_seconds=0):
+    """
+    Save duration_seconds of an audio file, from start_seconds, to a temporary mp3 file.
+
+    FFmpeg stops reading after the sample, so the rest of the file is never decoded.
+    """
+    sample_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
+    sample_file.close()
+
+    cmd = [
+        "ffmpeg",
+        "-ss", str(start_seconds),
+        "-t", str(duration_seconds),
+        "-i", audio_file,
+        "-vn",
+        "-y",  # Overwrite the empty temporary file
+        sample_file.name
+    ]
+
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+        return sample_file.name
+    except subprocess.CalledProcessError as e:
+        os.unlink(sample_file.name)
+        st.error(f"Error extracting audio sample: {e.stderr.decode()}")
+        return None
+
+@st.cache_data(show_spinner=False, max_entries=4)
 def get_audio_player_html(audio_path):
-    """Create an HTML audio player for the given audio file"""
+    """Create an HTML audio player for the given audio file (cached per path)"""
     audio_format = audio_path.split(".")[-1].lower()
 
     # Read audio file and encode to base64
@@ -71,6 +124,9 @@ def get_audio_player_html(audio_path):
 def download_youtube_audio(youtube_url):
     """Download audio from YouTube video using yt-dlp"""
     try:
+        # Imported lazily so the app can start without loading yt-dlp
+        import yt_dlp
+
         # Create a temporary directory to store the downloaded file
         temp_dir = tempfile.mkdtemp()
         output_template = os.path.join(temp_dir, "audio.%(ext)s")
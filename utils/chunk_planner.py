@@ -0,0 +1,220 @@
+import streamlit as st
+import heapq
+import math
+import random
+import threading
+from collections import deque
+
+# 30MB is a safe limit for Groq API; sizes are measured as 16kHz 16-bit audio, as in chunk_audio
+MAX_CHUNK_MB = 30
+BYTES_PER_SECOND = 16000 * 2
+
+# Bounds on the plans the planner will consider
+MIN_CHUNK_SECONDS = 60
+MAX_CHUNKS = 64
+OVERLAP_SECONDS = 2
+
+# Number of chunk requests sent to the API at the same time
+DEFAULT_CONCURRENCY = 4
+
+# Groq bills every request for at least 10 seconds of audio
+MIN_BILLED_SECONDS = 10
+
+# Length of the sample sent in each language detection request
+DETECTION_SAMPLE_SECONDS = 15
+
+# Seconds of latency worth trading for one extra billed second of audio (overlap, minimum billing)
+COST_WEIGHT = 0.05
+
+# Latency model used until enough requests have been observed
+DEFAULT_REQUEST_OVERHEAD = 1.5  # seconds per request for upload and queueing
+DEFAULT_SECONDS_PER_AUDIO_SECOND = 0.02  # processing time per second of audio
+MIN_SAMPLES = 3
+
+
+class LatencyModel:
+    """
+    Per-request latency observed on past jobs, fitted as overhead + rate * audio seconds
+    """
+
+    def __init__(self, max_samples=200):
+        self.samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record(self, audio_seconds, latency_seconds):
+        """Record how long a request for audio_seconds of audio took"""
+        with self._lock:
+            self.samples.append((audio_seconds, latency_seconds))
+
+    def estimate(self):
+        """Return (request overhead, seconds per audio second) fitted by least squares"""
+        with self._lock:
+            samples = list(self.samples)
+
+        if len(samples) < MIN_SAMPLES:
+            return DEFAULT_REQUEST_OVERHEAD, DEFAULT_SECONDS_PER_AUDIO_SECOND
+
+        mean_x = sum(x for x, _ in samples) / len(samples)
+        mean_y = sum(y for _, y in samples) / len(samples)
+        var_x = sum((x - mean_x) ** 2 for x, _ in samples)
+
+        # All requests had the same length: keep the default overhead and fit the rate only
+        if var_x == 0 or mean_x == 0:
+            overhead = min(DEFAULT_REQUEST_OVERHEAD, mean_y)
+            return overhead, max((mean_y - overhead) / max(mean_x, 1), 0.0)
+
+        rate = sum((x - mean_x) * (y - mean_y) for x, y in samples) / var_x
+        rate = max(rate, 0.0)
+        overhead = max(mean_y - rate * mean_x, 0.0)
+
+        return overhead, rate
+
+
+@st.cache_resource(show_spinner=False)
+def get_latency_model():
+    """Return the latency model shared by all jobs on this server"""
+    return LatencyModel()
+
+
+def chunk_bounds(duration_seconds, num_chunks, overlap_seconds=OVERLAP_SECONDS):
+    """
+    Return the (start_ms, end_ms) of each chunk, split as chunk_audio splits them;
+    a single chunk has no known end, as it is sent without being cut.
+    """
+    if num_chunks == 1:
+        return [(0, None)]
+
+    duration_ms = duration_seconds * 1000
+    chunk_ms = duration_ms / num_chunks
+    bounds = []
+    for i in range(num_chunks):
+        end_ms = duration_ms if i == num_chunks - 1 else min((i + 1) * chunk_ms + overlap_seconds * 1000, duration_ms)
+        bounds.append((int(i * chunk_ms), int(end_ms)))
+    return bounds
+
+
+def estimate_plan(
+    duration_seconds, num_chunks, concurrency, overhead, rate, overlap_seconds=OVERLAP_SECONDS, detections=0
+):
+    """
+    Estimate the wall-clock latency and billed audio of splitting audio into num_chunks,
+    detections of which first need a language detection request.
+    """
+    if num_chunks == 1:
+        chunk_seconds = duration_seconds
+    else:
+        chunk_seconds = duration_seconds / num_chunks + overlap_seconds
+
+    request_latency = overhead + rate * chunk_seconds
+    waves = math.ceil(num_chunks / max(concurrency, 1))
+    billed_seconds = num_chunks * max(chunk_seconds, MIN_BILLED_SECONDS)
+
+    # Detection requests run before their chunks' requests, in waves of their own
+    detection_latency = overhead + rate * DETECTION_SAMPLE_SECONDS
+    detection_waves = math.ceil(detections / max(concurrency, 1))
+    billed_seconds += detections * max(DETECTION_SAMPLE_SECONDS, MIN_BILLED_SECONDS)
+
+    return {
+        "num_chunks": num_chunks,
+        "chunk_seconds": chunk_seconds,
+        "overlap_seconds": overlap_seconds if num_chunks > 1 else 0,
+        "detections": detections,
+        "expected_latency": waves * request_latency + detection_waves * detection_latency,
+        "expected_billed_seconds": billed_seconds,
+    }
+
+
+def plan_chunks(
+    duration_seconds,
+    concurrency=DEFAULT_CONCURRENCY,
+    latency_model=None,
+    min_chunks=1,
+    max_chunk_mb=MAX_CHUNK_MB,
+    overlap_seconds=OVERLAP_SECONDS,
+    cost_weight=COST_WEIGHT,
+    language="auto",
+    needs_detection=None,
+):
+    """
+    Choose how many chunks to split the audio into.
+
+    Every chunk count between the fewest the size limit allows and the most the
+    minimum chunk length allows is scored as expected latency plus cost_weight
+    times the audio billed beyond the audio's own duration; the lowest score wins,
+    with ties going to fewer chunks. Pass min_chunks=2 when the file itself is
+    too large to upload in one request.
+
+    With language "auto" every chunk costs a detection request, unless
+    needs_detection(start_ms, end_ms) says its language is already cached.
+    """
+    overhead, rate = (latency_model or LatencyModel()).estimate()
+
+    max_chunk_seconds = max_chunk_mb * 1024 * 1024 / BYTES_PER_SECOND
+    fewest = max(min_chunks, math.ceil(duration_seconds / (max_chunk_seconds - overlap_seconds)), 1)
+    most = max(fewest, min(MAX_CHUNKS, math.floor(duration_seconds / MIN_CHUNK_SECONDS)))
+
+    best = None
+    for num_chunks in range(fewest, most + 1):
+        detections = 0
+        if language == "auto":
+            detections = sum(
+                1
+                for start_ms, end_ms in chunk_bounds(duration_seconds, num_chunks, overlap_seconds)
+                if needs_detection is None or needs_detection(start_ms, end_ms)
+            )
+
+        plan = estimate_plan(duration_seconds, num_chunks, concurrency, overhead, rate, overlap_seconds, detections)
+        extra_billed = plan["expected_billed_seconds"] - duration_seconds
+        plan["score"] = plan["expected_latency"] + cost_weight * extra_billed
+
+        if best is None or plan["score"] < best["score"]:
+            best = plan
+
+    return best
+
+
+class SimulatedLatency:
+    """
+    Deterministic stand-in for the transcription API, for exercising the planner offline
+    """
+
+    def __init__(self, overhead, seconds_per_audio_second, jitter=0.0, seed=0):
+        self.overhead = overhead
+        self.seconds_per_audio_second = seconds_per_audio_second
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def __call__(self, audio_seconds):
+        noise = 1 + self._random.uniform(-self.jitter, self.jitter)
+        return (self.overhead + self.seconds_per_audio_second * audio_seconds) * noise
+
+
+def simulate_jobs(durations, simulator, concurrency=DEFAULT_CONCURRENCY, latency_model=None, **plan_options):
+    """
+    Plan and run a series of jobs against a simulator, feeding the observed
+    latencies back into the latency model as real jobs do.
+
+    Returns one plan per job with its "simulated_latency" added.
+    """
+    latency_model = latency_model or LatencyModel()
+
+    plans = []
+    for duration_seconds in durations:
+        plan = plan_chunks(duration_seconds, concurrency, latency_model, **plan_options)
+
+        # Chunks are handed to the first free worker, as the thread pool does
+        workers = [0.0] * max(concurrency, 1)
+        for i in range(plan["num_chunks"]):
+            latency = simulator(plan["chunk_seconds"])
+            latency_model.record(plan["chunk_seconds"], latency)
+
+            # A language detection request runs first, but is not recorded as a chunk request
+            if i < plan["detections"]:
+                latency += simulator(DETECTION_SAMPLE_SECONDS)
+
+            heapq.heappush(workers, heapq.heappop(workers) + latency)
+
+        plan["simulated_latency"] = max(workers)
+        plans.append(plan)
+
+    return plans
@@ -0,0 +1,438 @@
+import streamlit as st
+import html
+import json
+import mmap
+import os
+import re
+import struct
+from utils.transcription import CombinedTranscription
+
+# File extension for each supported transcript format
+FORMATS = {
+    "json": ".json",
+    "jsonl": ".jsonl",
+    "vtt": ".vtt",
+    "wlts": ".wlts",
+}
+
+# Names shown for each format in the UI
+FORMAT_NAMES = {
+    "json": "JSON",
+    "jsonl": "JSON Lines (one word per line)",
+    "vtt": "WebVTT",
+    "wlts": "Binary with time index",
+}
+
+# Binary layout (little endian):
+#   header     magic, version, language count, word count
+#   languages  language count * (1-byte length, UTF-8 language tag)
+#   records    word count * (start, end, text offset, text length, language index), sorted by start
+#   text       UTF-8 word texts, addressed by the records
+BINARY_MAGIC = b"WLTS"
+BINARY_VERSION = 2
+BINARY_HEADER = struct.Struct("<4sHHI")
+BINARY_LANGUAGE_LENGTH = struct.Struct("<B")
+BINARY_RECORD = struct.Struct("<ddIHH")
+NO_LANGUAGE = 0xFFFF
+
+# Words outside any segment are grouped into cues of at most this many words,
+# split wherever the speaker pauses for longer than VTT_PAUSE_SECONDS
+VTT_WORDS_PER_CUE = 12
+VTT_PAUSE_SECONDS = 1.0
+
+VTT_TIMESTAMP = re.compile(r"<(\d{2}:\d{2}:\d{2}\.\d{3})>")
+VTT_LANGUAGE = re.compile(r"^<lang ([^>]+)>(.*)</lang>$", re.DOTALL)
+
+
+def get_words(transcription):
+    """Return the transcription words as plain dicts"""
+    return [
+        {
+            "word": word.get("word"),
+            "start": word.get("start"),
+            "end": word.get("end"),
+            "language": word.get("language"),
+        }
+        for word in getattr(transcription, "words", None) or []
+    ]
+
+
+def get_segments(transcription):
+    """Return the transcription segments as plain dicts"""
+    return [dict(segment) for segment in getattr(transcription, "segments", None) or []]
+
+
+def build_transcription(words, segments=None):
+    """Create a transcription the Word Finder can search from loaded words and segments"""
+    segments = segments or []
+    source = segments if segments else words
+    text = " ".join((item.get("text") or item.get("word") or "").strip() for item in source)
+
+    return CombinedTranscription(words, segments, text)
+
+
+def to_json(transcription):
+    """Serialize the full transcription, words and segments, as JSON"""
+    data = {
+        "text": getattr(transcription, "text", ""),
+        "words": get_words(transcription),
+        "segments": get_segments(transcription),
+    }
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def from_json(data):
+    """Load a transcription written by to_json"""
+    parsed = json.loads(data)
+    transcription = build_transcription(parsed.get("words", []), parsed.get("segments", []))
+    transcription.text = parsed.get("text", transcription.text)
+    return transcription
+
+
+def to_jsonl(transcription):
+    """Serialize the words as JSON lines, one word per line"""
+    lines = [json.dumps(word, ensure_ascii=False) for word in get_words(transcription)]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def from_jsonl(data):
+    """Load a transcription written by to_jsonl"""
+    words = [json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip()]
+    return build_transcription(words)
+
+
+def format_vtt_timestamp(seconds):
+    """
+    Format seconds as HH:MM:SS.mmm for WebVTT files, rounded to the millisecond.
+    """
+    milliseconds = round(seconds * 1000)
+    hours, milliseconds = divmod(milliseconds, 3600 * 1000)
+    minutes, milliseconds = divmod(milliseconds, 60 * 1000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+
+def parse_vtt_timestamp(timestamp):
+    """
+    Parse a WebVTT HH:MM:SS.mmm (or MM:SS.mmm) timestamp into seconds.
+    """
+    seconds = 0.0
+    for part in timestamp.strip().split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def word_cues(words):
+    """
+    Group words that belong to no segment into cues of their own, breaking at
+    pauses, language changes and every VTT_WORDS_PER_CUE words.
+    """
+    cues = []
+    for word in words:
+        current = cues[-1] if cues else None
+        if (
+            current is None
+            or len(current["words"]) >= VTT_WORDS_PER_CUE
+            or word["start"] - current["end"] > VTT_PAUSE_SECONDS
+            or word["language"] != current["language"]
+        ):
+            current = {"start": word["start"], "end": word["end"], "language": word["language"], "words": []}
+            cues.append(current)
+
+        current["words"].append(word)
+        current["end"] = max(current["end"], word["end"])
+
+    return cues
+
+
+def to_vtt(transcription):
+    """
+    Serialize the transcription as WebVTT cues, one per segment.
+
+    Word start times are kept as inline cue timestamps and the segment language
+    as a <lang> span, so the file still plays as ordinary captions. Words outside
+    every segment, or all words when there are no segments, get cues of their own.
+    """
+    words = sorted(get_words(transcription), key=lambda word: word["start"])
+    segments = sorted(get_segments(transcription), key=lambda segment: segment["start"])
+
+    cues = []
+    position = 0
+    for segment in segments:
+        start, end = segment["start"], segment["end"]
+
+        orphans = []
+        while position < len(words) and words[position]["start"] < start:
+            orphans.append(words[position])
+            position += 1
+        cues.extend(word_cues(orphans))
+
+        segment_words = []
+        while position < len(words) and words[position]["start"] < end:
+            segment_words.append(words[position])
+            position += 1
+
+        cues.append(
+            {
+                "start": start,
+                "end": end,
+                "language": segment.get("language"),
+                "words": segment_words,
+                "text": segment["text"],
+            }
+        )
+
+    cues.extend(word_cues(words[position:]))
+
+    lines = ["WEBVTT", ""]
+    for i, cue in enumerate(cues):
+        tokens = []
+        for word in cue["words"]:
+            text = html.escape(word["word"].strip(), quote=False)
+            # Cue timestamps must fall strictly inside the cue
+            if word["start"] > cue["start"]:
+                text = f"<{format_vtt_timestamp(word['start'])}>{text}"
+            tokens.append(text)
+
+        text = " ".join(tokens) if tokens else html.escape(cue["text"].strip(), quote=False)
+        if cue["language"]:
+            text = f"<lang {cue['language']}>{text}</lang>"
+
+        lines.append(str(i + 1))
+        lines.append(f"{format_vtt_timestamp(cue['start'])} --> {format_vtt_timestamp(cue['end'])}")
+        lines.append(text)
+        lines.append("")
+
+    return "\n".join(lines).encode("utf-8")
+
+
+def from_vtt(data):
+    """
+    Load a transcription from WebVTT.
+
+    Words come from inline cue timestamps; a word ends where the next one starts
+    (or at the cue end), since WebVTT does not store word end times.
+    """
+    words = []
+    segments = []
+
+    for block in re.split(r"\n\s*\n", data.decode("utf-8").replace("\r\n", "\n")):
+        lines = block.strip().split("\n")
+        timing = next((i for i, line in enumerate(lines) if "-->" in line), None)
+        if timing is None:
+            continue
+
+        start_text, end_text = lines[timing].split("-->")
+        start = parse_vtt_timestamp(start_text)
+        end = parse_vtt_timestamp(end_text.split()[0])
+        text = "\n".join(lines[timing + 1 :])
+
+        language = None
+        match = VTT_LANGUAGE.match(text)
+        if match:
+            language, text = match.group(1), match.group(2)
+
+        # Split into (start, text) pieces at each inline timestamp
+        parts = VTT_TIMESTAMP.split(text)
+        pieces = [(start, parts[0])] + [
+            (parse_vtt_timestamp(parts[i]), parts[i + 1]) for i in range(1, len(parts), 2)
+        ]
+
+        cue_words = []
+        for piece_start, piece_text in pieces:
+            for token in piece_text.split():
+                cue_words.append({"word": html.unescape(token), "start": piece_start, "language": language})
+
+        for j, word in enumerate(cue_words):
+            word["end"] = cue_words[j + 1]["start"] if j + 1 < len(cue_words) else end
+        words.extend(cue_words)
+
+        plain_text = html.unescape(VTT_TIMESTAMP.sub("", text))
+        segments.append(
+            {"id": len(segments), "start": start, "end": end, "text": plain_text, "language": language}
+        )
+
+    return build_transcription(words, segments)
+
+
+def to_binary(transcription):
+    """Serialize the words in the compact binary format, sorted by start time"""
+    words = sorted(get_words(transcription), key=lambda word: word["start"])
+
+    languages = sorted({word["language"] for word in words if word["language"]})
+    language_index = {language: i for i, language in enumerate(languages)}
+    if len(languages) >= NO_LANGUAGE:
+        raise ValueError(f"Too many languages for a binary transcript: {len(languages)}")
+
+    records = []
+    texts = []
+    offset = 0
+    for word in words:
+        encoded = word["word"].encode("utf-8")
+        if len(encoded) > 0xFFFF:
+            raise ValueError(f"Word is too long for a binary transcript: {word['word'][:40]}...")
+        language = language_index.get(word["language"], NO_LANGUAGE)
+        records.append(BINARY_RECORD.pack(word["start"], word["end"], offset, len(encoded), language))
+        texts.append(encoded)
+        offset += len(encoded)
+
+    header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(languages), len(words))
+
+    language_table = []
+    for language in languages:
+        encoded = language.encode("utf-8")
+        if len(encoded) > 255:
+            raise ValueError(f"Language tag is too long for a binary transcript: {language[:40]}...")
+        language_table.append(BINARY_LANGUAGE_LENGTH.pack(len(encoded)) + encoded)
+
+    return header + b"".join(language_table) + b"".join(records) + b"".join(texts)
+
+
+class BinaryTranscript:
+    """
+    Random access to a binary transcript held in a buffer or memory-mapped file.
+
+    Records are read on demand, so a time range lookup only touches the records
+    visited by the binary search and the words it returns.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+        magic, version, language_count, word_count = BINARY_HEADER.unpack_from(buffer, 0)
+        if magic != BINARY_MAGIC:
+            raise ValueError("Not a WLTS binary transcript")
+        if version != BINARY_VERSION:
+            raise ValueError(f"Unsupported WLTS binary transcript version {version}")
+
+        self.languages = []
+        offset = BINARY_HEADER.size
+        for _ in range(language_count):
+            (length,) = BINARY_LANGUAGE_LENGTH.unpack_from(buffer, offset)
+            offset += BINARY_LANGUAGE_LENGTH.size
+            self.languages.append(bytes(buffer[offset : offset + length]).decode("utf-8"))
+            offset += length
+
+        self.word_count = word_count
+        self.records_offset = offset
+        self.text_offset = self.records_offset + word_count * BINARY_RECORD.size
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map a binary transcript file"""
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self):
+        return self.word_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the memory map, if the transcript was opened from a file"""
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def start_at(self, index):
+        """Return the start time of the word at index"""
+        return struct.unpack_from("<d", self.buffer, self.records_offset + index * BINARY_RECORD.size)[0]
+
+    def word_at(self, index):
+        """Return the word at index as a dict"""
+        start, end, offset, length, language = BINARY_RECORD.unpack_from(
+            self.buffer, self.records_offset + index * BINARY_RECORD.size
+        )
+        text_start = self.text_offset + offset
+        return {
+            "word": bytes(self.buffer[text_start : text_start + length]).decode("utf-8"),
+            "start": start,
+            "end": end,
+            "language": self.languages[language] if language != NO_LANGUAGE else None,
+        }
+
+    def bisect(self, seconds):
+        """Return the index of the first word starting at or after seconds"""
+        low, high = 0, self.word_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.start_at(middle) < seconds:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def words_between(self, start, end):
+        """Return the words starting between start and end seconds (inclusive)"""
+        words = []
+        for index in range(self.bisect(start), self.word_count):
+            if self.start_at(index) > end:
+                break
+            words.append(self.word_at(index))
+        return words
+
+    def to_transcription(self):
+        """Read every word into a transcription the Word Finder can search"""
+        return build_transcription([self.word_at(i) for i in range(self.word_count)])
+
+
+def from_binary(data):
+    """Load a transcription written by to_binary"""
+    return BinaryTranscript(data).to_transcription()
+
+
+def words_between(path, start, end):
+    """Return the words starting between start and end seconds from a binary transcript file"""
+    with BinaryTranscript.open(path) as transcript:
+        return transcript.words_between(start, end)
+
+
+WRITERS = {"json": to_json, "jsonl": to_jsonl, "vtt": to_vtt, "wlts": to_binary}
+READERS = {"json": from_json, "jsonl": from_jsonl, "vtt": from_vtt, "wlts": from_binary}
+
+
+def format_from_path(path):
+    """Return the transcript format for a file name, based on its extension"""
+    extension = os.path.splitext(path)[1].lower()
+    for fmt, fmt_extension in FORMATS.items():
+        if extension == fmt_extension:
+            return fmt
+    raise ValueError(f"Unsupported transcript format: {extension or path}")
+
+
+def dump_transcript(transcription, fmt):
+    """Serialize a transcription to bytes in the given format"""
+    return WRITERS[fmt](transcription)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def dump_transcript_cached(transcript_id, _transcription, fmt):
+    """Serialize a transcription once per transcript id and format, reused across reruns"""
+    return dump_transcript(_transcription, fmt)
+
+
+def load_transcript_bytes(data, fmt):
+    """Load a transcription from bytes in the given format"""
+    return READERS[fmt](data)
+
+
+def save_transcript(transcription, path):
+    """Write a transcription to a file, choosing the format from the extension"""
+    with open(path, "wb") as f:
+        f.write(dump_transcript(transcription, format_from_path(path)))
+    return path
+
+
+def load_transcript(path):
+    """Read a transcription from a file, choosing the format from the extension"""
+    fmt = format_from_path(path)
+    if fmt == "wlts":
+        with BinaryTranscript.open(path) as transcript:
+            return transcript.to_transcription()
+
+    with open(path, "rb") as f:
+        return load_transcript_bytes(f.read(), fmt)
@@ -1,83 +1,372 @@
 import streamlit as st
-from groq import Groq
+import math
 import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from utils.chunk_planner import (
+    DEFAULT_CONCURRENCY,
+    DETECTION_SAMPLE_SECONDS,
+    MAX_CHUNK_MB,
+    get_latency_model,
+    plan_chunks,
+)
+
+# Model used for each detected language code; anything not listed uses "default"
+MODEL_POLICY = {
+    "en": "whisper-large-v3-turbo",
+    "default": "whisper-large-v3",
+}
+
+# Cheap model and short sample used for the language detection pre-pass
+DETECTION_MODEL = "whisper-large-v3-turbo"
+
+# Languages offered in the UI, mapped to the codes Whisper accepts
+SUPPORTED_LANGUAGES = {
+    "en": "English",
+    "es": "Spanish",
+    "fr": "French",
+    "de": "German",
+    "it": "Italian",
+    "pt": "Portuguese",
+    "nl": "Dutch",
+    "ru": "Russian",
+    "ar": "Arabic",
+    "hi": "Hindi",
+    "ta": "Tamil",
+    "ja": "Japanese",
+    "ko": "Korean",
+    "zh": "Chinese",
+}
+
+# Every language Whisper can detect, by the code it accepts as the language parameter
+WHISPER_LANGUAGES = {
+    "en": "english", "zh": "chinese", "de": "german", "es": "spanish", "ru": "russian",
+    "ko": "korean", "fr": "french", "ja": "japanese", "pt": "portuguese", "tr": "turkish",
+    "pl": "polish", "ca": "catalan", "nl": "dutch", "ar": "arabic", "sv": "swedish",
+    "it": "italian", "id": "indonesian", "hi": "hindi", "fi": "finnish", "vi": "vietnamese",
+    "he": "hebrew", "uk": "ukrainian", "el": "greek", "ms": "malay", "cs": "czech",
+    "ro": "romanian", "da": "danish", "hu": "hungarian", "ta": "tamil", "no": "norwegian",
+    "th": "thai", "ur": "urdu", "hr": "croatian", "bg": "bulgarian", "lt": "lithuanian",
+    "la": "latin", "mi": "maori", "ml": "malayalam", "cy": "welsh", "sk": "slovak",
+    "te": "telugu", "fa": "persian", "lv": "latvian", "bn": "bengali", "sr": "serbian",
+    "az": "azerbaijani", "sl": "slovenian", "kn": "kannada", "et": "estonian", "mk": "macedonian",
+    "br": "breton", "eu": "basque", "is": "icelandic", "hy": "armenian", "ne": "nepali",
+    "mn": "mongolian", "bs": "bosnian", "kk": "kazakh", "sq": "albanian", "sw": "swahili",
+    "gl": "galician", "mr": "marathi", "pa": "punjabi", "si": "sinhala", "km": "khmer",
+    "sn": "shona", "yo": "yoruba", "so": "somali", "af": "afrikaans", "oc": "occitan",
+    "ka": "georgian", "be": "belarusian", "tg": "tajik", "sd": "sindhi", "gu": "gujarati",
+    "am": "amharic", "yi": "yiddish", "lo": "lao", "uz": "uzbek", "fo": "faroese",
+    "ht": "haitian creole", "ps": "pashto", "tk": "turkmen", "nn": "nynorsk", "mt": "maltese",
+    "sa": "sanskrit", "lb": "luxembourgish", "my": "myanmar", "bo": "tibetan", "tl": "tagalog",
+    "mg": "malagasy", "as": "assamese", "tt": "tatar", "haw": "hawaiian", "ln": "lingala",
+    "ha": "hausa", "ba": "bashkir", "jw": "javanese", "su": "sundanese", "yue": "cantonese",
+}
+
+# Language names Whisper may report, including its aliases, mapped to codes
+WHISPER_LANGUAGE_CODES = {name: code for code, name in WHISPER_LANGUAGES.items()}
+WHISPER_LANGUAGE_CODES.update({
+    "burmese": "my", "valencian": "ca", "flemish": "nl", "haitian": "ht", "letzeburgesch": "lb",
+    "pushto": "ps", "panjabi": "pa", "moldavian": "ro", "moldovan": "ro", "sinhalese": "si",
+    "castilian": "es", "mandarin": "zh",
+})
+
+class CombinedTranscription:
+    """Transcription assembled from chunks or loaded from a saved transcript"""
+
+    def __init__(self, words, segments, text):
+        self.words = words
+        self.segments = segments
+        self.text = text
+
+@st.cache_resource(show_spinner=False)
+def get_groq_client(api_key):
+    """Return a Groq client for the given API key, reused across reruns"""
+    # Imported lazily so the app can start without loading the groq SDK
+    from groq import Groq
+
+    return Groq(api_key=api_key)
+
+def normalize_language(language):
+    """Turn a Whisper language name or code into its language code (None if unknown)"""
+    if not language:
+        return None
+
+    language = language.strip().lower()
+    if language in WHISPER_LANGUAGES:
+        return language
+
+    return WHISPER_LANGUAGE_CODES.get(language)
+
+def select_model(language, policy=None):
+    """Pick the Whisper model for a language according to the model policy"""
+    policy = policy or MODEL_POLICY
+    return policy.get(language, policy["default"])
+
+def request_transcription(file_path, api_key, model, language=None, timestamps=True):
+    """Send a file to the Groq transcription API; language=None lets Whisper auto-detect"""
+    client = get_groq_client(api_key)
+
+    options = {
+        "model": model,
+        "response_format": "verbose_json",
+        "temperature": 0.0,
+    }
+    if timestamps:
+        options["timestamp_granularities"] = ["word", "segment"]
+    if language:
+        options["language"] = language
+
+    with open(file_path, "rb") as file:
+        return client.audio.transcriptions.create(file=file, **options)
+
+def detect_language(audio_file, api_key, start_seconds=0):
+    """Detect the spoken language from a short sample of an audio file, from start_seconds"""
+    from utils.audio_processing import extract_audio_sample
+
+    sample_file = extract_audio_sample(audio_file, DETECTION_SAMPLE_SECONDS, start_seconds)
+    if not sample_file:
+        return None
 
-def transcribe_audio_chunk(chunk_file, api_key):
-    """Transcribe a single audio chunk using Groq API"""
     try:
-        client = Groq(api_key=api_key)
-
-        with open(chunk_file, "rb") as file:
-            transcription = client.audio.transcriptions.create(
-                file=file,
-                model="whisper-large-v3-turbo",
-                response_format="verbose_json",
-                timestamp_granularities=["word", "segment"],
-                language="en",
-                temperature=0.0,
-            )
+        result = request_transcription(sample_file, api_key, DETECTION_MODEL, timestamps=False)
+        return normalize_language(getattr(result, "language", None))
+    except Exception as e:
+        st.warning(f"Language detection failed, falling back to auto-detect: {e}")
+        return None
+    finally:
+        try:
+            os.unlink(sample_file)
+        except:
+            pass
+
+def detection_cells(start_ms, end_ms=None):
+    """
+    Return the DETECTION_SAMPLE_SECONDS grid cells whose sample lies within the audio
+    from start_ms to end_ms (only the first cell when the end is unknown).
+    """
+    sample_ms = DETECTION_SAMPLE_SECONDS * 1000
+    first_cell = math.ceil(start_ms / sample_ms)
+    last_cell = first_cell if end_ms is None else max(first_cell, (end_ms - sample_ms) // sample_ms)
+    return range(first_cell, last_cell + 1)
+
+def get_language_cache(cache_key):
+    """Return the languages detected so far for a video, by grid cell"""
+    if cache_key is None:
+        return {}
+    return st.session_state.setdefault("detected_languages", {}).setdefault(cache_key, {})
+
+def resolve_language(audio_file, api_key, language="auto", cache_key=None, start_ms=0, end_ms=None):
+    """
+    Return the language to transcribe a chunk with.
+
+    A fixed language is used as is. With "auto" the language is detected from a
+    sample aligned to a fixed DETECTION_SAMPLE_SECONDS grid of the video and cached
+    per video (cache_key) and grid cell, so later jobs reuse it however the planner
+    cuts their chunks. audio_file holds the video from start_ms to end_ms.
+    """
+    if language != "auto":
+        return language
+
+    cache = get_language_cache(cache_key)
+    cells = detection_cells(start_ms, end_ms)
+
+    # Reuse any cached cell whose sample lies within this audio
+    for cell in cells:
+        if cell in cache:
+            return cache[cell]
+
+    sample_start_ms = cells[0] * DETECTION_SAMPLE_SECONDS * 1000
+    detected = detect_language(audio_file, api_key, (sample_start_ms - start_ms) / 1000)
+    if detected:
+        cache[cells[0]] = detected
+
+    return detected
+
+def tag_language(items, language):
+    """Record the language on each word or segment dict"""
+    for item in items or []:
+        item["language"] = language
+
+def get_transcription_languages(transcription):
+    """Return the sorted set of languages recorded on the transcription segments"""
+    segments = getattr(transcription, "segments", None) or []
+    return sorted({segment.get("language") for segment in segments if segment.get("language")})
+
+def chunk_keep_ranges(chunks, results):
+    """
+    Return, for each chunk, which of its words and segments to keep when merging.
+
+    Words are cut at the middle of the overlap with a transcribed neighbour, so a
+    word cut off at one chunk's edge comes from the other chunk, where it is whole.
+    Segments are only dropped when they lie inside the overlap and the neighbour
+    has them: "segments_from" is the earliest end and "segments_until" the latest
+    start a kept segment may have, so no captions are lost at chunk boundaries.
+    """
+    ranges = []
+    for i, chunk_info in enumerate(chunks):
+        keep = {
+            "words_from": float("-inf"),
+            "words_until": float("inf"),
+            "segments_from": float("-inf"),
+            "segments_until": float("inf"),
+        }
+        if i > 0 and results[i - 1]:
+            previous_end = chunks[i - 1]["end_ms"] / 1000
+            keep["words_from"] = (chunk_info["start_ms"] / 1000 + previous_end) / 2
+            keep["segments_from"] = previous_end
+        if i + 1 < len(chunks) and results[i + 1]:
+            next_start = chunks[i + 1]["start_ms"] / 1000
+            keep["words_until"] = (next_start + chunk_info["end_ms"] / 1000) / 2
+            keep["segments_until"] = next_start
+        ranges.append(keep)
+    return ranges
+
+def transcribe_audio_chunk(
+    chunk_file, api_key, language="auto", cache_key=None, start_ms=0, end_ms=None, policy=None, latency_model=None
+):
+    """
+    Transcribe a single audio chunk using Groq API, routed by its detected language.
+
+    The chunk covers start_ms to end_ms of the video. With a latency_model, the
+    transcription request alone (not language detection) is recorded.
+    """
+    try:
+        chunk_language = resolve_language(chunk_file, api_key, language, cache_key, start_ms, end_ms)
+        model = select_model(chunk_language, policy)
+
+        started = time.perf_counter()
+        transcription = request_transcription(chunk_file, api_key, model, chunk_language)
+        if latency_model is not None and end_ms is not None:
+            latency_model.record((end_ms - start_ms) / 1000, time.perf_counter() - started)
+
+        # Whisper reports the language it used when none was forced
+        chunk_language = chunk_language or normalize_language(getattr(transcription, "language", None))
+        tag_language(getattr(transcription, "words", None), chunk_language)
+        tag_language(getattr(transcription, "segments", None), chunk_language)
 
         return transcription
     except Exception as e:
         st.error(f"Error during chunk transcription: {e}")
         return None
 
-def transcribe_audio(file_path, api_key, use_chunking=True):
+def transcribe_audio(
+    file_path, api_key, use_chunking=True, language="auto", cache_key=None, policy=None, concurrency=DEFAULT_CONCURRENCY
+):
     """
-    Transcribe audio using Groq API with chunking for large files
+    Transcribe audio using Groq API, split into chunks sized by the chunk planner.
+
+    language is an ISO-639-1 code or "auto" to detect it per chunk; cache_key
+    identifies the video so detected languages can be reused on later runs.
+    Up to concurrency chunks are transcribed at the same time.
     """
     try:
+        from utils.audio_processing import chunk_audio, get_audio_duration
+
         # Check file size
         file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
-
-        # If file is small enough or chunking is disabled, transcribe directly
-        if file_size_mb < 30 or not use_chunking:  # 30MB is a safe limit for Groq API
-            client = Groq(api_key=api_key)
-
-            with open(file_path, "rb") as file:
-                transcription = client.audio.transcriptions.create(
-                    file=file,
-                    model="whisper-large-v3-turbo",
-                    response_format="verbose_json",
-                    timestamp_granularities=["word", "segment"],
-                    language="en",
-                    temperature=0.0,
+        latency_model = get_latency_model()
+        video_key = cache_key or file_path
+
+        plan = None
+        if use_chunking:
+            duration_seconds = get_audio_duration(file_path)
+
+            # A file over the size limit can never be sent in one request
+            min_chunks = 2 if file_size_mb >= MAX_CHUNK_MB else 1
+
+            if duration_seconds is not None:
+                # Chunks whose language is already cached for this video need no detection request
+                language_cache = get_language_cache(video_key)
+                plan = plan_chunks(
+                    duration_seconds,
+                    concurrency,
+                    latency_model,
+                    min_chunks=min_chunks,
+                    language=language,
+                    needs_detection=lambda start_ms, end_ms: not any(
+                        cell in language_cache for cell in detection_cells(start_ms, end_ms)
+                    ),
                 )
+            elif min_chunks > 1:
+                st.error(f"Audio file is {file_size_mb:.1f}MB and cannot be split without its duration")
+                return None
+            # Otherwise the file is small enough to send whole, as without the planner
+
+        # If the planner keeps the file whole or chunking is disabled, transcribe directly
+        if plan is None or plan["num_chunks"] == 1:
+            file_language = resolve_language(file_path, api_key, language, video_key)
+            model = select_model(file_language, policy)
+
+            started = time.perf_counter()
+            transcription = request_transcription(file_path, api_key, model, file_language)
+
+            if plan:
+                latency_model.record(plan["chunk_seconds"], time.perf_counter() - started)
+
+            file_language = file_language or normalize_language(getattr(transcription, "language", None))
+            tag_language(getattr(transcription, "words", None), file_language)
+            tag_language(getattr(transcription, "segments", None), file_language)
 
             return transcription
 
-        # For larger files, use chunking
+        # Otherwise transcribe the planned chunks in parallel
         else:
-            from utils.audio_processing import chunk_audio
-
-            st.info(f"Audio file is {file_size_mb:.1f}MB, using chunking for processing")
+            st.info(
+                f"Audio file is {file_size_mb:.1f}MB, using {plan['num_chunks']} chunks of "
+                f"{plan['chunk_seconds']:.0f}s (expected {plan['expected_latency']:.0f}s)"
+            )
 
             # Split audio into chunks
-            chunks = chunk_audio(file_path)
+            chunks = chunk_audio(file_path, overlap_seconds=plan["overlap_seconds"], num_chunks=plan["num_chunks"])
 
             if not chunks:
                 return None
 
-            # Process each chunk
+            def process_chunk(chunk_info):
+                return transcribe_audio_chunk(
+                    chunk_info["file"],
+                    api_key,
+                    language,
+                    video_key,
+                    chunk_info["start_ms"],
+                    chunk_info["end_ms"],
+                    policy,
+                    latency_model,
+                )
+
+            # Worker threads need the script context to use st.* calls and session state;
+            # create this video's language cache up front so the workers only fill it in
+            ctx = get_script_run_ctx()
+            get_language_cache(video_key)
+
+            def attach_script_context():
+                add_script_run_ctx(threading.current_thread(), ctx)
+
+            # Process the chunks, updating progress as each one finishes
             progress_bar = st.progress(0)
             status_text = st.empty()
 
+            results = [None] * len(chunks)
+            with ThreadPoolExecutor(max_workers=concurrency, initializer=attach_script_context) as executor:
+                futures = {executor.submit(process_chunk, chunk_info): i for i, chunk_info in enumerate(chunks)}
+
+                for done, future in enumerate(as_completed(futures), start=1):
+                    results[futures[future]] = future.result()
+                    progress_bar.progress(done / len(chunks))
+                    status_text.text(f"Processed chunk {done}/{len(chunks)}")
+
             all_words = []
             all_segments = []
 
-            for i, chunk_info in enumerate(chunks):
+            for chunk_info, chunk_result, keep in zip(
+                chunks, results, chunk_keep_ranges(chunks, results)
+            ):
                 chunk_file = chunk_info["file"]
                 chunk_start_ms = chunk_info["start_ms"]
 
-                # Update progress
-                progress = (i) / len(chunks)
-                progress_bar.progress(progress)
-                status_text.text(f"Processing chunk {i+1}/{len(chunks)}")
-
-                # Transcribe chunk
-                chunk_result = transcribe_audio_chunk(chunk_file, api_key)
-
                 if chunk_result:
                     # Adjust timestamps based on chunk position
                     chunk_start_seconds = chunk_start_ms / 1000
@@ -89,7 +378,18 @@ def transcribe_audio(file_path, api_key, use_chunking=True):
                             word_start = word.get("start") + chunk_start_seconds
                             word_end = word.get("end") + chunk_start_seconds
 
-                            all_words.append({"word": word.get("word"), "start": word_start, "end": word_end})
+                            # Overlap words are taken from whichever chunk holds them whole
+                            if not keep["words_from"] <= word_start < keep["words_until"]:
+                                continue
+
+                            all_words.append(
+                                {
+                                    "word": word.get("word"),
+                                    "start": word_start,
+                                    "end": word_end,
+                                    "language": word.get("language"),
+                                }
+                            )
 
                     # Process segments
                     if hasattr(chunk_result, "segments"):
@@ -98,6 +398,10 @@ def transcribe_audio(file_path, api_key, use_chunking=True):
                             segment_start = segment.get("start") + chunk_start_seconds
                             segment_end = segment.get("end") + chunk_start_seconds
 
+                            # Segments inside the overlap are taken from the neighbouring chunk
+                            if segment_end <= keep["segments_from"] or segment_start >= keep["segments_until"]:
+                                continue
+
                             all_segments.append(
                                 {
                                     "id": segment.get("id"),
@@ -110,6 +414,7 @@ def transcribe_audio(file_path, api_key, use_chunking=True):
                                     "avg_logprob": segment.get("avg_logprob"),
                                     "compression_ratio": segment.get("compression_ratio"),
                                     "no_speech_prob": segment.get("no_speech_prob"),
+                                    "language": segment.get("language"),
                                 }
                             )
 
@@ -120,16 +425,8 @@ def transcribe_audio(file_path, api_key, use_chunking=True):
                     pass
 
             # Update progress to complete
-            progress_bar.progress(1.0)
             status_text.text("Processing complete!")
 
-            # Create a combined result object
-            class CombinedTranscription:
-                def __init__(self, words, segments, text):
-                    self.words = words
-                    self.segments = segments
-                    self.text = text
-
             # Combine all segment texts
             full_text = " ".join([segment["text"] for segment in all_segments])
 
@@ -157,7 +454,8 @@ def find_word_instances(transcription, search_word):
             found_instances.append({
                 "word": word,
                 "start": word_info.get("start"),
-                "end": word_info.get("end")
+                "end": word_info.get("end"),
+                "language": word_info.get("language"),
             })
 
     return found_instances
\ No newline at end of file
@@ -1,12 +1,15 @@
 import streamlit as st
 from streamlit_extras.stylable_container import stylable_container
 from utils.audio_processing import get_audio_player_html
+from utils.transcription import SUPPORTED_LANGUAGES
 import base64
 import os
 
 
 def apply_custom_css():
     """Apply custom CSS styling to the entire application."""
+    # Streamlit drops any element that is not re-emitted on a rerun, so the CSS
+    # must be injected every time; it is a static string and costs nothing to build.
     # Hide default menu and footer
     hide_st_style = """
         <style>
@@ -149,6 +152,17 @@ def display_footer():
         st.markdown("Powered by Groq's whisper-large-v3-turbo model | Created with Streamlit")
 
 
+def language_selector(key=None):
+    """Display a language picker and return "auto" or the chosen ISO-639-1 code."""
+    options = ["auto"] + list(SUPPORTED_LANGUAGES)
+    return st.selectbox(
+        "Language",
+        options,
+        format_func=lambda code: "Auto-detect" if code == "auto" else SUPPORTED_LANGUAGES[code],
+        key=key,
+    )
+
+
 def display_word_search_results(found_instances, audio_file=None, transcription=None):
     """Display search results in a styled table and optionally show audio player"""
     if found_instances:
@@ -177,30 +191,37 @@ def display_word_search_results(found_instances, audio_file=None, transcription=
             # Create a table for the results
             results_table = []
             for i, instance in enumerate(found_instances):
-                results_table.append(
-                    {
-                        "Instance": i + 1,
-                        "Word": instance["word"],
-                        "Start Time": f"{int(instance['start'] // 60)}:{int(instance['start'] % 60):02d}",
-                        "End Time": f"{int(instance['end'] // 60)}:{int(instance['end'] % 60):02d}",
-                    }
-                )
+                row = {
+                    "Instance": i + 1,
+                    "Word": instance["word"],
+                    "Start Time": f"{int(instance['start'] // 60)}:{int(instance['start'] % 60):02d}",
+                    "End Time": f"{int(instance['end'] // 60)}:{int(instance['end'] % 60):02d}",
+                }
+                if instance.get("language"):
+                    row["Language"] = instance["language"]
+                results_table.append(row)
 
             st.table(results_table)
     else:
         st.warning("No instances found")
 
 
+@st.cache_data(show_spinner=False)
+def load_svg_base64(svg_path):
+    """Read an SVG file and return it base64 encoded, cached across reruns."""
+    with open(svg_path, "rb") as f:
+        svg_data = f.read()
+
+    return base64.b64encode(svg_data).decode("utf-8")
+
+
 def display_badge():
     """Display the PBG badge in the corner of the app."""
     # Path to the SVG file
     svg_path = os.path.join("static", "images", "PBG mark2 color.svg")
 
-    # Read the SVG file and encode it as base64
-    with open(svg_path, "rb") as f:
-        svg_data = f.read()
-
-    b64_svg = base64.b64encode(svg_data).decode("utf-8")
+    # Read the SVG file and encode it as base64 (cached after the first run)
+    b64_svg = load_svg_base64(svg_path)
 
     badge_html = f"""
     <style>
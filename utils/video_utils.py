@@ -2,7 +2,6 @@ import streamlit as st
 import os
 import tempfile
 import subprocess
-import yt_dlp
 
 def download_youtube_video(youtube_url):
     """
@@ -35,9 +34,12 @@ def format_timestamp(seconds):
 
     return f"{hours:02d}:{minutes:02d}:{int(seconds):02d},{milliseconds:03d}"
 
-def generate_srt_from_whisper_json(transcription, output_path):
+def generate_srt_from_whisper_json(transcription, output_path, tag_language=False):
     """
     Generate an SRT file from Whisper JSON output.
+
+    SRT has no metadata field, so with tag_language each cue is prefixed with
+    its segment language, e.g. "[fr] Bonjour".
     """
     segments = transcription.segments
 
@@ -47,6 +49,9 @@ def generate_srt_from_whisper_json(transcription, output_path):
             end_time = format_timestamp(segment["end"])
             text = segment["text"].strip()
 
+            if tag_language and segment.get("language"):
+                text = f"[{segment['language']}] {text}"
+
             # Write SRT entry
             srt_file.write(f"{i+1}\n")
             srt_file.write(f"{start_time} --> {end_time}\n")